@@ -1,13 +1,20 @@
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 from dotenv import load_dotenv
 import re
-import time
-import json
+import functools
+import asyncio
 import os
+import json
 import phonenumbers
-import numpy as np
+from urllib.parse import urldefrag, urljoin, urlparse
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # Load environment variables (for API key, etc.)
 load_dotenv()
@@ -15,120 +22,450 @@ load_dotenv()
 # File paths for input and output
 INPUT_EXCEL = r"./school_data/excel_input/Top_1000_Teams_Cleaned.xlsx"
 OUTPUT_JSON = "./school_data/json_input/schools_data_full.json"
+# Append-only log written after every school; OUTPUT_JSON is written at the end
+OUTPUT_JSONL = os.path.splitext(OUTPUT_JSON)[0] + ".jsonl"
+# Columnar copy of the results: one complete part file per batch of schools,
+# so the directory stays readable (pd.read_parquet) even after a crash
+OUTPUT_PARQUET_DIR = os.path.splitext(OUTPUT_JSON)[0] + "_parquet"
+PARQUET_BATCH_SIZE = 50
 OUTPUT_EXCEL = "./school_data/excel_output/Top_1000_Teams.xlsx"
 os.makedirs(os.path.dirname(OUTPUT_JSON), exist_ok=True)
 
+# Fields added to every input row by the scraper
+OUTPUT_FIELDS = ["Website", "District", "Address", "Tel", "Email"]
+
+# Precompiled regex patterns used while extracting contact details
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+SPLIT_RE = re.compile(r"[\/,]")
+DIGITS_RE = re.compile(r"\d")
+DISTRICT_RE = re.compile(r"(?i)district[:\s-]*")
+PIPE_RE = re.compile(r"\s*\|\s*")
+WS_RE = re.compile(r"\s+")
+SUBPAGE_RE = re.compile(r"contact|about|reach-us|address", re.I)
+
+# At most this many same-site Contact/About subpages are fetched per URL
+MAX_SUBPAGES = 2
+
+SERPER_URL = "https://google.serper.dev/search"
+# Serper accepts a JSON array of queries; this many are sent per request
+SEARCH_BATCH_SIZE = 100
+# Avoid spammy/non-official sites
+SEARCH_BLACKLIST = ["indiastudychannel.com"]
+
+# Number of schools scraped concurrently
+MAX_CONCURRENT_SCHOOLS = 16
+# Consecutive failures after which a host is skipped for the rest of the run
+MAX_HOST_FAILURES = 3
+
+# Tags whose contents are never visible page text
+NON_TEXT_TAGS = ["script", "style", "noscript"]
+
+
+@functools.lru_cache(maxsize=64)
+def _addr_re(state_ut):
+    """Compiled "number ... <state>" address pattern, cached per state."""
+    return re.compile(r"\d{1,4}.*(" + re.escape(state_ut) + r")", re.I)
+
+
+def _split_chunks(text):
+    """Lazily yield the pieces of text between "/" and "," separators."""
+    start = 0
+    for m in SPLIT_RE.finditer(text):
+        yield text[start : m.start()]
+        start = m.end()
+    yield text[start:]
+
+
+def _dedupe_by_host(urls):
+    """Keep only the first (best-ranked) URL for each host."""
+    seen_hosts = set()
+    unique = []
+    for url in urls:
+        host = urlparse(url).netloc.lower()
+        if host not in seen_hosts:
+            seen_hosts.add(host)
+            unique.append(url)
+    return unique
+
+
+def _loads(data):
+    """Parse JSON with orjson, falling back to json for NaN/Infinity literals."""
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # json.dump writes NaN/Infinity by default; orjson rejects them
+        return json.loads(data)
+
+
+def _ends_with_newline(path):
+    """True if the file is empty or its last byte is a newline."""
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _parquet_value(value):
+    """Cell value as a nullable string for the all-string Parquet schema."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+def _node_text(node, separator):
+    """Non-empty, stripped text nodes under node joined by separator.
+
+    selectolax's text(strip=True) still emits a separator for whitespace-only
+    nodes, so empty pieces are dropped here (as bs4's get_text did).
+    """
+    parts = (part.strip() for part in node.text(separator="\x00").split("\x00"))
+    return separator.join(part for part in parts if part)
+
+
+def _page_text(tree):
+    """Visible text of a parsed page, one text node per line."""
+    tree.strip_tags(NON_TEXT_TAGS)
+    root = tree.body or tree.root
+    return _node_text(root, "\n") if root else ""
+
+
+def _subpage_links(tree, url):
+    """Unique same-host Contact/About links on a page, capped at MAX_SUBPAGES."""
+    host = urlparse(url).netloc
+    links = []
+    for a in tree.css("a[href]"):
+        href = a.attributes.get("href") or ""
+        if not SUBPAGE_RE.search(href):
+            continue
+        page = urldefrag(urljoin(url, href))[0]
+        if urlparse(page).netloc != host or page in links:
+            continue
+        links.append(page)
+        if len(links) == MAX_SUBPAGES:
+            break
+    return links
+
+
+def _search_query(school_name, state_ut):
+    """Serper query text for a school, with whitespace collapsed."""
+    school_name_clean = " ".join(school_name.split())
+    state_ut_clean = " ".join(state_ut.split())
+    return f"{school_name_clean} {state_ut_clean} official website"
+
+
+def _top_websites(result):
+    """Extract the top 5 relevant links from one Serper search result."""
+    websites = []
+    for item in result.get("organic") or []:
+        link = item.get("link", "")
+        if link and not any(bad in link for bad in SEARCH_BLACKLIST):
+            if link.startswith(("http://", "https://")):
+                websites.append(link)
+        if len(websites) == 5:
+            break
+    return websites
+
 
 class SchoolDataScraper:
     def __init__(self):
         # Get API key from .env file
         self.api_key = os.getenv("SERPER_API_KEY")
         self.processed_data = []
+        # (school, state) keys of processed_data for O(1) duplicate checks
+        self._processed_keys = set()
+        # Keys of schools currently being scraped, reserved before any await
+        self._in_progress = set()
+        # Websites prefetched by batched search, keyed by (school, state)
+        self.search_results = {}
+        # Scraped info per (url, state), shared across schools for this run
+        self._page_cache = {}
+        # Consecutive fetch failures per host, and hosts given up on
+        self._host_failures = {}
+        self._bad_hosts = set()
+        # Output schema (input columns + OUTPUT_FIELDS), fixed by run()
+        self.columns = []
+        # Input row position per school key; records finish out of order
+        self.row_order = {}
+        # Parquet schema is set by run() once the columns are known (None = off)
+        self.parquet_schema = None
+        self._parquet_part = 0
+        self._parquet_buffer = []
+        # Async HTTP/2 client for scraping school sites (multiplexes requests)
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            timeout=15,
+            follow_redirects=True,
+            headers={"User-Agent": "Mozilla/5.0"},
+        )
+        # Reuse keep-alive connections (and TLS sessions) for Serper searches
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        adapter = HTTPAdapter(
+            pool_connections=64,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "POST"],
+                respect_retry_after_header=True,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.load_existing_data()
+        self.jsonl_file = self.open_jsonl()
 
     def load_existing_data(self):
-        """Load already processed data from JSON to avoid duplication."""
-        if os.path.exists(OUTPUT_JSON):
-            try:
-                with open(OUTPUT_JSON, "r", encoding="utf-8") as f:
-                    self.processed_data = json.load(f)
+        """Load already processed data (JSONL log, else JSON snapshot)."""
+        path = None
+        try:
+            if os.path.exists(OUTPUT_JSONL):
+                path = OUTPUT_JSONL
+                with open(OUTPUT_JSONL, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            self.processed_data.append(_loads(line))
+                        except ValueError:
+                            # Partial line left by an interrupted write
+                            print(f"Skipping malformed line in {OUTPUT_JSONL}")
+                print(f"Loaded {len(self.processed_data)} existing records from JSONL")
+            elif os.path.exists(OUTPUT_JSON):
+                path = OUTPUT_JSON
+                with open(OUTPUT_JSON, "rb") as f:
+                    self.processed_data = _loads(f.read())
                 print(f"Loaded {len(self.processed_data)} existing records from JSON")
-            except Exception as e:
-                print(f"Error loading existing JSON: {e}")
-                self.processed_data = []
+        except Exception as e:
+            print(f"Error loading existing data: {e}")
+            self.processed_data = []
+            if path is not None:
+                # Move the unreadable file aside so later saves can't overwrite it
+                backup = path + ".unreadable"
+                os.replace(path, backup)
+                print(f"Moved {path} to {backup}; it will not be overwritten")
+        self._processed_keys = {
+            self._record_key(r.get("School", ""), r.get("State/UT", ""))
+            for r in self.processed_data
+        }
+
+    def open_jsonl(self):
+        """Open the JSONL log for appending, seeding it from a legacy JSON file."""
+        seed = not os.path.exists(OUTPUT_JSONL)
+        jsonl_file = open(OUTPUT_JSONL, "ab")
+        if seed:
+            for record in self.processed_data:
+                jsonl_file.write(self._json_line(record))
+            jsonl_file.flush()
+        elif not _ends_with_newline(OUTPUT_JSONL):
+            # Terminate a partial line left by a killed write, so the next
+            # record starts on its own line instead of being glued to it
+            jsonl_file.write(b"\n")
+            jsonl_file.flush()
+        return jsonl_file
+
+    @staticmethod
+    def _json_line(record):
+        """Serialize one record as a JSONL line (NumPy scalars handled by orjson)."""
+        return orjson.dumps(
+            record, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+        )
+
+    def ordered_records(self):
+        """Processed records in input-file order (rows not in the input last)."""
+        last = len(self.row_order)
+        return sorted(
+            self.processed_data,
+            key=lambda r: self.row_order.get(
+                self._record_key(r.get("School", ""), r.get("State/UT", "")), last
+            ),
+        )
 
     def save_to_json(self):
-        """Save processed data into JSON file (convert NumPy types to native)."""
+        """Save a full snapshot of processed data into the JSON file."""
         try:
-            data_to_save = []
-            for record in self.processed_data:
-                safe_record = {
-                    k: (v.item() if isinstance(v, np.generic) else v)
-                    for k, v in record.items()
-                }
-                data_to_save.append(safe_record)
-
-            with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+            with open(OUTPUT_JSON, "wb") as f:
+                f.write(
+                    orjson.dumps(
+                        self.ordered_records(),
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+                    )
+                )
             print(f"Data saved to {OUTPUT_JSON}")
         except Exception as e:
             print(f"Error saving JSON: {e}")
 
+    def open_parquet(self):
+        """Start the Parquet checkpoint, catching up on records it is missing."""
+        try:
+            os.makedirs(OUTPUT_PARQUET_DIR, exist_ok=True)
+            parts = sorted(
+                name
+                for name in os.listdir(OUTPUT_PARQUET_DIR)
+                if name.startswith("part-") and name.endswith(".parquet")
+            )
+            # Keys already in a part file; every other record (buffered when a
+            # crash hit, or from a failed flush) is re-queued below
+            written = set()
+            for name in parts:
+                table = pq.read_table(
+                    os.path.join(OUTPUT_PARQUET_DIR, name),
+                    columns=["School", "State/UT"],
+                ).to_pydict()
+                written.update(
+                    map(self._record_key, table["School"], table["State/UT"])
+                )
+            self._parquet_part = int(parts[-1][5:-8]) + 1 if parts else 0
+            self.parquet_schema = pa.schema([(c, pa.string()) for c in self.columns])
+        except Exception as e:
+            # Parquet is an extra output; the JSONL log is still written
+            print(f"Parquet output disabled: {e}")
+            self.parquet_schema = None
+            return
+        self._parquet_buffer = [
+            r
+            for r in self.processed_data
+            if self._record_key(r.get("School", ""), r.get("State/UT", ""))
+            not in written
+        ]
+        self.flush_parquet()
+
+    def flush_parquet(self):
+        """Write buffered records as the next complete Parquet part file."""
+        if self.parquet_schema is None or not self._parquet_buffer:
+            return
+        try:
+            rows = [
+                {c: _parquet_value(r.get(c)) for c in self.columns}
+                for r in self._parquet_buffer
+            ]
+            name = f"part-{self._parquet_part:05d}.parquet"
+            path = os.path.join(OUTPUT_PARQUET_DIR, name)
+            # Write to a temp name first so a part is never seen half-written;
+            # the "." prefix hides a leftover temp file from pd.read_parquet
+            tmp_path = os.path.join(OUTPUT_PARQUET_DIR, f".{name}.tmp")
+            pq.write_table(
+                pa.Table.from_pylist(rows, schema=self.parquet_schema),
+                tmp_path,
+                compression="zstd",
+            )
+            os.replace(tmp_path, path)
+            self._parquet_part += 1
+            self._parquet_buffer = []
+        except Exception as e:
+            # Keep the buffer; the next flush retries it with the newer records
+            print(f"Error saving Parquet: {e}")
+
+    def close_parquet(self):
+        """Write the records still buffered for Parquet."""
+        self.flush_parquet()
+
+    def add_record(self, record):
+        """Append a finished record to memory, the JSONL log and Parquet."""
+        self.processed_data.append(record)
+        self._processed_keys.add(
+            self._record_key(record.get("School", ""), record.get("State/UT", ""))
+        )
+        self.jsonl_file.write(self._json_line(record))
+        self.jsonl_file.flush()
+        if self.parquet_schema is not None:
+            self._parquet_buffer.append(record)
+            # After a failed flush, retry once another batch has built up
+            if len(self._parquet_buffer) % PARQUET_BATCH_SIZE == 0:
+                self.flush_parquet()
+
+    @staticmethod
+    def _record_key(school_name, state_ut):
+        """Normalised (school, state) key used for duplicate detection."""
+        # Collapse all whitespace (incl. embedded newlines in legacy records)
+        return (
+            " ".join(str(school_name).split()).lower(),
+            " ".join(str(state_ut).split()).lower(),
+        )
+
     def is_already_processed(self, school_name, state_ut):
-        """Check if the school has already been processed to skip duplicates."""
-        for record in self.processed_data:
-            if (
-                record.get("School", "").strip().lower() == school_name.strip().lower()
-                and record.get("State/UT", "").strip().lower()
-                == state_ut.strip().lower()
-            ):
-                return True
-        return False
+        """Check if the school is processed or in progress, to skip duplicates."""
+        key = self._record_key(school_name, state_ut)
+        return key in self._processed_keys or key in self._in_progress
 
-    def search_school_websites(self, school_name, state_ut, retries=5):
-        """Use Serper API to fetch top official-looking school websites."""
-        school_name_clean = " ".join(school_name.split())
-        state_ut_clean = " ".join(state_ut.split())
-        query_text = f"{school_name_clean} {state_ut_clean} official website"
+    def search_school_websites(self, school_name, state_ut):
+        """Use Serper API to fetch top official-looking school websites.
 
-        url = "https://google.serper.dev/search"
+        Retries with backoff are handled by the session's HTTPAdapter.
+        """
+        school_name_clean = " ".join(school_name.split())
         headers = {
             "X-API-KEY": self.api_key,
             "Content-Type": "application/json",
         }
-        payload = {"q": query_text}
-
-        # Avoid spammy/non-official sites
-        blacklist = ["indiastudychannel.com"]
+        payload = {"q": _search_query(school_name, state_ut)}
 
-        for attempt in range(retries):
-            try:
-                response = requests.post(url, headers=headers, json=payload, timeout=15)
-                response.raise_for_status()
-                result = response.json()
-
-                websites = []
-                # Extract top 5 relevant links
-                if "organic" in result and result["organic"]:
-                    for item in result["organic"]:
-                        link = item.get("link", "")
-                        if link and not any(bad in link for bad in blacklist):
-                            if link.startswith(("http://", "https://")):
-                                websites.append(link)
-                        if len(websites) == 5:
-                            break
-
-                if websites:
-                    print(
-                        f"Top {len(websites)} sites for {school_name_clean}: {websites}"
-                    )
-                    return websites
+        try:
+            response = self.session.post(
+                SERPER_URL, headers=headers, json=payload, timeout=15
+            )
+            response.raise_for_status()
+            websites = _top_websites(response.json())
 
-            except Exception as e:
-                print(f"Search attempt {attempt+1} failed for {school_name_clean}: {e}")
+            if websites:
+                print(f"Top {len(websites)} sites for {school_name_clean}: {websites}")
+                return websites
 
-            # Wait before retrying to avoid rate limits
-            if attempt < retries - 1:
-                time.sleep(2)
+        except Exception as e:
+            print(f"Search failed for {school_name_clean}: {e}")
 
         print(f"No websites found for {school_name_clean}")
         return []
 
+    def prefetch_websites(self, schools):
+        """Search websites for many (school, state) pairs in batched requests.
+
+        Schools without results here fall back to search_school_websites.
+        """
+        headers = {
+            "X-API-KEY": self.api_key,
+            "Content-Type": "application/json",
+        }
+        for start in range(0, len(schools), SEARCH_BATCH_SIZE):
+            batch = schools[start : start + SEARCH_BATCH_SIZE]
+            payload = [{"q": _search_query(s, st)} for s, st in batch]
+            try:
+                response = self.session.post(
+                    SERPER_URL, headers=headers, json=payload, timeout=60
+                )
+                response.raise_for_status()
+                # Results come back in the same order as the queries
+                # Empty results are stored too, so _scrape_and_save does not
+                # repeat them as paid per-school searches
+                for key, result in zip(batch, response.json()):
+                    self.search_results[key] = _top_websites(result)
+            except Exception as e:
+                print(
+                    f"Batch search failed for schools "
+                    f"{start + 1}-{start + len(batch)}: {e}"
+                )
+        found = sum(1 for websites in self.search_results.values() if websites)
+        print(f"Prefetched websites for {found}/{len(schools)} schools")
+
     def extract_info(self, text, state_ut=""):
         """Extract district, address, phone, and email from raw webpage text."""
         info = {"District": "", "Address": "", "Tel": "", "Email": ""}
 
         # Extract emails
-        emails = re.findall(
-            r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", text
-        )
-        for e in emails:
+        for m in EMAIL_RE.finditer(text):
+            e = m.group()
             if not any(d in e.lower() for d in ["facebook.com", "twitter.com"]):
                 info["Email"] = e
                 break
 
         # Extract phone numbers (using phonenumbers library)
-        for raw_number in re.split(r"[\/,]", text):
+        for raw_number in _split_chunks(text):
+            # Building a matcher is costly; chunks without digits can't match
+            if not DIGITS_RE.search(raw_number):
+                continue
             for match in phonenumbers.PhoneNumberMatcher(raw_number, "IN"):
                 info["Tel"] = phonenumbers.format_number(
                     match.number, phonenumbers.PhoneNumberFormat.INTERNATIONAL
@@ -144,35 +481,64 @@ class SchoolDataScraper:
             if (
                 not info["Address"]
                 and state_ut
-                and re.search(r"\d{1,4}.*(" + re.escape(state_ut) + r")", line, re.I)
+                and _addr_re(state_ut).search(line)
             ):
                 info["Address"] = line
             # If line contains "district", extract district name
             if not info["District"] and "district" in line.lower() and len(line) < 100:
-                info["District"] = (
-                    re.sub(r"(?i)district[:\s-]*", "", line).strip().title()
-                )
+                info["District"] = DISTRICT_RE.sub("", line).strip().title()
+            if info["Address"] and info["District"]:
+                break
 
         return info
 
-    def scrape_school_info(self, url, state_ut=""):
+    async def fetch_page(self, url):
+        """GET a page; return its raw bytes and final URL (after redirects)."""
+        host = urlparse(url).netloc
+        try:
+            response = await self.client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            # A 4xx means the host is up; count only connection errors and 5xx
+            if (
+                not isinstance(e, httpx.HTTPStatusError)
+                or e.response.status_code >= 500
+            ):
+                failures = self._host_failures.get(host, 0) + 1
+                self._host_failures[host] = failures
+                if failures >= MAX_HOST_FAILURES:
+                    self._bad_hosts.add(host)
+            raise
+        self._host_failures[host] = 0
+        return response.content, str(response.url)
+
+    async def scrape_school_info(self, url, state_ut=""):
         """Scrape school website for contact info, address, district, etc."""
+        cached = self._page_cache.get((url, state_ut))
+        if cached is not None:
+            return dict(cached)
+
         info = {"District": "", "Address": "", "Tel": "", "Email": ""}
+        if urlparse(url).netloc in self._bad_hosts:
+            print(f"Skipping {url}: host failed {MAX_HOST_FAILURES} times in a row")
+            return info
         addresses = []
 
+        fetched = False
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, timeout=15, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+            content, page_url = await self.fetch_page(url)
+            fetched = True
+            # Parse the whole page: contact details often sit in <div>, <td> or
+            # <span> text, so tag-filtered parsing loses recall
+            tree = LexborHTMLParser(content)
 
             # Extract address if present in <p class="loc-icon">
-            loc_p = soup.find("p", class_="loc-icon")
+            loc_p = tree.css_first("p.loc-icon")
             if loc_p:
-                addresses.append(loc_p.get_text(separator=", ", strip=True))
+                addresses.append(_node_text(loc_p, ", "))
 
             # Extract info from page text
-            text = soup.get_text(separator="\n", strip=True)
+            text = _page_text(tree)
             page_info = self.extract_info(text, state_ut)
             if page_info.get("Address"):
                 addresses.append(page_info["Address"])
@@ -180,50 +546,45 @@ class SchoolDataScraper:
                 if page_info.get(key) and not info[key]:
                     info[key] = page_info[key]
 
-            # Follow "Contact / About / Reach Us" subpages
-            for a in soup.find_all("a", href=True):
-                page = a["href"]
-                if any(
-                    k in page.lower()
-                    for k in ["contact", "about", "reach-us", "address"]
-                ):
-                    if not page.startswith("http"):
-                        page = requests.compat.urljoin(url, page)
-                    try:
-                        resp = requests.get(page, headers=headers, timeout=15)
-                        resp.raise_for_status()
-                        text_page = BeautifulSoup(resp.text, "html.parser").get_text(
-                            separator="\n", strip=True
-                        )
-                        new_info = self.extract_info(text_page, state_ut)
-                        if new_info.get("Address"):
-                            addresses.append(new_info["Address"])
-                        for key in ["Tel", "Email", "District"]:
-                            if new_info.get(key) and not info[key]:
-                                info[key] = new_info[key]
-                    except:
-                        continue
+            # Follow "Contact / About / Reach Us" subpages (fetched concurrently)
+            pages = await asyncio.gather(
+                *(self.fetch_page(page) for page in _subpage_links(tree, page_url)),
+                return_exceptions=True,
+            )
+            for page in pages:
+                if isinstance(page, Exception):
+                    continue
+                text_page = _page_text(LexborHTMLParser(page[0]))
+                new_info = self.extract_info(text_page, state_ut)
+                if new_info.get("Address"):
+                    addresses.append(new_info["Address"])
+                for key in ["Tel", "Email", "District"]:
+                    if new_info.get(key) and not info[key]:
+                        info[key] = new_info[key]
 
             # Merge multiple addresses into one string
             clean_addresses = []
             for addr in addresses:
-                addr = re.sub(r"\s*\|\s*", ", ", addr)
-                addr = re.sub(r"\s+", " ", addr).strip()
+                addr = PIPE_RE.sub(", ", addr)
+                addr = WS_RE.sub(" ", addr).strip()
                 if addr not in clean_addresses:
                     clean_addresses.append(addr)
             info["Address"] = " | ".join(clean_addresses)
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Request failed for {url}: {e}")
         except Exception as e:
             print(f"Failed to scrape {url}: {e}")
 
-        return info
+        # Only cache real results so a transient failure can be retried
+        if fetched:
+            self._page_cache[(url, state_ut)] = info
+        return dict(info)
 
-    def process_school(self, row_data, index, total):
+    async def process_school(self, row_data, index, total):
         """Process one school: search website, scrape data, and save results."""
-        school_name = str(row_data["School"]).replace("\n", " ").strip()
-        state_ut = str(row_data["State/UT"]).replace("\n", " ").strip()
+        school_name = row_data["School"]
+        state_ut = row_data["State/UT"]
 
         # Skip if already processed
         if self.is_already_processed(school_name, state_ut):
@@ -232,25 +593,43 @@ class SchoolDataScraper:
 
         print(f"{index+1}/{total} - Processing: {school_name}, {state_ut}")
 
+        # Reserve the key synchronously so a duplicate row can't start meanwhile
+        key = self._record_key(school_name, state_ut)
+        self._in_progress.add(key)
+        try:
+            await self._scrape_and_save(row_data, school_name, state_ut)
+        finally:
+            self._in_progress.discard(key)
+
+    async def _scrape_and_save(self, row_data, school_name, state_ut):
+        """Search and scrape one school, then save its record."""
         # Initialize record with empty values
         record = dict(row_data)
-        record.update(
-            {"Website": "", "District": "", "Address": "", "Tel": "", "Email": ""}
-        )
-
-        # Step 1: Search for websites
-        websites = self.search_school_websites(school_name, state_ut)
+        record.update(dict.fromkeys(OUTPUT_FIELDS, ""))
+
+        # Step 1: Search for websites (single search only if its batch failed)
+        websites = self.search_results.pop((school_name, state_ut), None)
+        if websites is None:
+            # Blocking requests-based search runs off the event loop
+            websites = await asyncio.to_thread(
+                self.search_school_websites, school_name, state_ut
+            )
         if not websites:
-            self.processed_data.append(record)
-            self.save_to_json()
+            self.add_record(record)
             return
 
         record["Website"] = websites[0]  # Pick first website as main
+        # Several results often point at the same site (/, /about, /contact)
+        websites = _dedupe_by_host(websites)
+
+        # Step 2: Scrape all found websites concurrently
+        results = await asyncio.gather(
+            *(self.scrape_school_info(url, state_ut) for url in websites)
+        )
 
-        # Step 2: Scrape each found website
+        # Merge in search-rank order so the best-ranked site wins
         merged_info = {"District": "", "Address": "", "Tel": "", "Email": ""}
-        for url in websites:
-            info = self.scrape_school_info(url, state_ut)
+        for info in results:
             for key, value in info.items():
                 # Keep first valid value for each field
                 if not merged_info[key] and value:
@@ -264,40 +643,72 @@ class SchoolDataScraper:
         )
 
         # Save result
-        self.processed_data.append(record)
-        self.save_to_json()
-        time.sleep(1)  # Delay to avoid hitting rate limits
+        self.add_record(record)
+        await asyncio.sleep(1)  # Delay to avoid hitting rate limits
+
+    async def process_all(self, df):
+        """Process every row, at most MAX_CONCURRENT_SCHOOLS at a time."""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCHOOLS)
+
+        async def worker(index, row):
+            async with semaphore:
+                try:
+                    await self.process_school(row, index, len(df))
+                except Exception as e:
+                    print(f"Error processing row {index}: {e}")
+
+        try:
+            await asyncio.gather(*(worker(index, row) for index, row in df.iterrows()))
+        finally:
+            await self.client.aclose()
 
     def run(self):
         """Main runner: load input, iterate schools, save results."""
         try:
             print(f"Loading Excel file: {INPUT_EXCEL}")
-            df = pd.read_excel(INPUT_EXCEL)
+            df = pd.read_excel(INPUT_EXCEL, engine="openpyxl")
             print(f"Loaded {len(df)} records from Excel")
+            self.columns = list(df.columns) + OUTPUT_FIELDS
+            self.open_parquet()
 
-            # Resume from last processed index
-            start_index = len(self.processed_data)
-            if start_index > 0:
-                print(f"Resuming from record {start_index+1}/{len(df)}")
+            # Clean the name columns once, vectorized, instead of per row
+            for col in ["School", "State/UT"]:
+                df[col] = (
+                    df[col].astype(str).str.replace("\n", " ", regex=False).str.strip()
+                )
+            for index, key in enumerate(zip(df["School"], df["State/UT"])):
+                self.row_order.setdefault(self._record_key(*key), index)
 
-            for index, row in df.iterrows():
-                if index < start_index:
-                    continue
-                try:
-                    self.process_school(row, index, len(df))
-                except KeyboardInterrupt:
-                    print("\nProcess interrupted by user. Data saved to JSON.")
-                    break
-                except Exception as e:
-                    print(f"Error processing row {index}: {e}")
-                    continue
+            # Resume: rows already in the JSON are skipped by process_school.
+            # Schools finish out of order, so the record count is not a row index.
+            if self.processed_data:
+                print(
+                    f"Resuming with {len(self.processed_data)}/{len(df)} "
+                    "records already processed"
+                )
+
+            # Batch the website searches for every school still to do
+            pending = [
+                key
+                for key in dict.fromkeys(zip(df["School"], df["State/UT"]))
+                if not self.is_already_processed(*key)
+            ]
+            self.prefetch_websites(pending)
 
-            # Save all results to Excel
+            try:
+                asyncio.run(self.process_all(df))
+            except KeyboardInterrupt:
+                print("\nProcess interrupted by user. Data saved to JSON.")
+
+            # Write the final JSON snapshot and Excel output
+            self.save_to_json()
             self.save_to_excel()
 
         except Exception as e:
             print(f"Error in main execution: {e}")
         finally:
+            self.jsonl_file.close()
+            self.close_parquet()
             print(
                 f"Process completed. Total records processed: {len(self.processed_data)}"
             )
@@ -306,7 +717,10 @@ class SchoolDataScraper:
         """Save processed results to an Excel file."""
         try:
             if self.processed_data:
-                df_output = pd.DataFrame(self.processed_data)
+                # Fixed column order and dtypes, so pandas doesn't infer them
+                df_output = pd.DataFrame(
+                    self.ordered_records(), columns=self.columns or None
+                ).astype(dict.fromkeys(OUTPUT_FIELDS, "string"))
                 df_output.to_excel(OUTPUT_EXCEL, index=False)
                 print(f"Excel file saved to {OUTPUT_EXCEL}")
             else:
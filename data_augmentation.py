@@ -1,13 +1,20 @@
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 from dotenv import load_dotenv
 import re
-import time
-import json
+import functools
+import asyncio
 import os
+import json
 import phonenumbers
-import numpy as np
+from urllib.parse import urldefrag, urljoin, urlparse
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # Load environment variables
 load_dotenv()
@@ -15,170 +22,426 @@ load_dotenv()
 # File paths
 INPUT_EXCEL = r"./school_data/excel_input/Top_1000_Teams_Cleaned.xlsx"
 OUTPUT_JSON = "./school_data/json_input/schools_data_full_6.json"
+OUTPUT_JSONL = os.path.splitext(OUTPUT_JSON)[0] + ".jsonl"
+OUTPUT_PARQUET_DIR = os.path.splitext(OUTPUT_JSON)[0] + "_parquet"
+PARQUET_BATCH_SIZE = 50
 OUTPUT_EXCEL = "./school_data/excel_output/Top_1000_Teams_Full_6.xlsx"
 os.makedirs(os.path.dirname(OUTPUT_JSON), exist_ok=True)
 
+OUTPUT_FIELDS = ["Website", "District", "Address", "Tel", "Email"]
+
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+SPLIT_RE = re.compile(r"[\/,]")
+DIGITS_RE = re.compile(r"\d")
+DISTRICT_WORD_RE = re.compile(r"\b(district|dist|dt\.?)\b", re.I)
+NON_TEXT_TAGS = ["script", "style", "noscript"]
+SUBPAGE_RE = re.compile(r"contact|about|reach-us|address", re.I)
+MAX_SUBPAGES = 2
+SERPER_URL = "https://google.serper.dev/search"
+SEARCH_BATCH_SIZE = 100
+SEARCH_BLACKLIST = ["indiastudychannel.com"]
+MAX_CONCURRENT_SCHOOLS = 16
+MAX_HOST_FAILURES = 3
+DISTRICT_CLEAN_RE = re.compile(r"(?i)district[:\s-]*|opening of the new|reg|government of|india")
+
+@functools.lru_cache(maxsize=64)
+def _addr_re(state_ut):
+    return re.compile(r"\d{1,4}.*(" + re.escape(state_ut) + r")", re.I)
+
+@functools.lru_cache(maxsize=64)
+def _district_guess_re(state_ut):
+    return re.compile(r"(.+?),?\s*" + re.escape(state_ut), re.I)
+
+def _split_chunks(text):
+    start = 0
+    for m in SPLIT_RE.finditer(text):
+        yield text[start:m.start()]
+        start = m.end()
+    yield text[start:]
+
+def _dedupe_by_host(urls):
+    seen_hosts = set()
+    unique = []
+    for url in urls:
+        host = urlparse(url).netloc.lower()
+        if host not in seen_hosts:
+            seen_hosts.add(host)
+            unique.append(url)
+    return unique
+
+def _loads(data):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # older json.dump output may contain NaN/Infinity, which orjson rejects
+        return json.loads(data)
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+def _parquet_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+def _node_text(node, separator):
+    # text(strip=True) keeps separators for whitespace-only nodes; drop them
+    parts = (part.strip() for part in node.text(separator="\x00").split("\x00"))
+    return separator.join(part for part in parts if part)
+
+def _page_text(tree):
+    tree.strip_tags(NON_TEXT_TAGS)
+    root = tree.body or tree.root
+    return _node_text(root, "\n") if root else ""
+
+def _subpage_links(tree, url):
+    host = urlparse(url).netloc
+    links = []
+    for a in tree.css("a[href]"):
+        href = a.attributes.get("href") or ""
+        if not SUBPAGE_RE.search(href):
+            continue
+        page = urldefrag(urljoin(url, href))[0]
+        if urlparse(page).netloc != host or page in links:
+            continue
+        links.append(page)
+        if len(links) == MAX_SUBPAGES:
+            break
+    return links
+
+def _search_query(school_name, state_ut):
+    school_name_clean = " ".join(school_name.split())
+    state_ut_clean = " ".join(state_ut.split())
+    return f"{school_name_clean} {state_ut_clean} official website"
+
+def _top_websites(result):
+    websites = []
+    for item in result.get("organic") or []:
+        link = item.get("link", "")
+        if link and not any(bad in link for bad in SEARCH_BLACKLIST):
+            if link.startswith(("http://", "https://")):
+                websites.append(link)
+        if len(websites) == 5:
+            break
+    return websites
+
 class SchoolDataScraper:
     def __init__(self):
         self.api_key = os.getenv("SERPER_API_KEY")
         self.processed_data = []
+        self._processed_keys = set()
+        self._in_progress = set()
+        self.search_results = {}
+        self._page_cache = {}
+        self._host_failures = {}
+        self._bad_hosts = set()
+        self.columns = []
+        self.row_order = {}
+        self.parquet_schema = None
+        self._parquet_part = 0
+        self._parquet_buffer = []
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            timeout=15,
+            follow_redirects=True,
+            headers={"User-Agent": "Mozilla/5.0"},
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        adapter = HTTPAdapter(
+            pool_connections=64,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET", "POST"],
+                respect_retry_after_header=True,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.load_existing_data()
+        self.jsonl_file = self.open_jsonl()
 
     def load_existing_data(self):
-        if os.path.exists(OUTPUT_JSON):
-            try:
-                with open(OUTPUT_JSON, "r", encoding="utf-8") as f:
-                    self.processed_data = json.load(f)
+        path = None
+        try:
+            if os.path.exists(OUTPUT_JSONL):
+                path = OUTPUT_JSONL
+                with open(OUTPUT_JSONL, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            self.processed_data.append(_loads(line))
+                        except ValueError:
+                            print(f"Skipping malformed line in {OUTPUT_JSONL}")
+                print(f"Loaded {len(self.processed_data)} existing records from JSONL")
+            elif os.path.exists(OUTPUT_JSON):
+                path = OUTPUT_JSON
+                with open(OUTPUT_JSON, "rb") as f:
+                    self.processed_data = _loads(f.read())
                 print(f"Loaded {len(self.processed_data)} existing records from JSON")
-            except Exception as e:
-                print(f"Error loading existing JSON: {e}")
-                self.processed_data = []
+        except Exception as e:
+            print(f"Error loading existing data: {e}")
+            self.processed_data = []
+            if path is not None:
+                backup = path + ".unreadable"
+                os.replace(path, backup)
+                print(f"Moved {path} to {backup}; it will not be overwritten")
+        self._processed_keys = {
+            self._record_key(r.get("School", ""), r.get("State/UT", ""))
+            for r in self.processed_data
+        }
+
+    def open_jsonl(self):
+        seed = not os.path.exists(OUTPUT_JSONL)
+        jsonl_file = open(OUTPUT_JSONL, "ab")
+        if seed:
+            for record in self.processed_data:
+                jsonl_file.write(self._json_line(record))
+            jsonl_file.flush()
+        elif not _ends_with_newline(OUTPUT_JSONL):
+            # a killed write can leave a partial line; don't glue the next record onto it
+            jsonl_file.write(b"\n")
+            jsonl_file.flush()
+        return jsonl_file
+
+    @staticmethod
+    def _json_line(record):
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+
+    def ordered_records(self):
+        last = len(self.row_order)
+        return sorted(
+            self.processed_data,
+            key=lambda r: self.row_order.get(self._record_key(r.get("School", ""), r.get("State/UT", "")), last),
+        )
 
     def save_to_json(self):
         try:
-            # Convert numpy types to Python native types
-            data_to_save = []
-            for record in self.processed_data:
-                safe_record = {k: (v.item() if isinstance(v, np.generic) else v) for k, v in record.items()}
-                data_to_save.append(safe_record)
-            with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+            with open(OUTPUT_JSON, "wb") as f:
+                f.write(orjson.dumps(self.ordered_records(), option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
             print(f"Data saved to {OUTPUT_JSON}")
         except Exception as e:
             print(f"Error saving JSON: {e}")
 
+    def open_parquet(self):
+        try:
+            os.makedirs(OUTPUT_PARQUET_DIR, exist_ok=True)
+            parts = sorted(n for n in os.listdir(OUTPUT_PARQUET_DIR) if n.startswith("part-") and n.endswith(".parquet"))
+            # re-queue every record whose key isn't in a part yet (crash or failed flush)
+            written = set()
+            for n in parts:
+                table = pq.read_table(os.path.join(OUTPUT_PARQUET_DIR, n), columns=["School", "State/UT"]).to_pydict()
+                written.update(map(self._record_key, table["School"], table["State/UT"]))
+            self._parquet_part = int(parts[-1][5:-8]) + 1 if parts else 0
+            self.parquet_schema = pa.schema([(c, pa.string()) for c in self.columns])
+        except Exception as e:
+            print(f"Parquet output disabled: {e}")
+            self.parquet_schema = None
+            return
+        self._parquet_buffer = [
+            r for r in self.processed_data
+            if self._record_key(r.get("School", ""), r.get("State/UT", "")) not in written
+        ]
+        self.flush_parquet()
+
+    def flush_parquet(self):
+        if self.parquet_schema is None or not self._parquet_buffer:
+            return
+        try:
+            rows = [{c: _parquet_value(r.get(c)) for c in self.columns} for r in self._parquet_buffer]
+            name = f"part-{self._parquet_part:05d}.parquet"
+            path = os.path.join(OUTPUT_PARQUET_DIR, name)
+            # each part is a complete file, so the directory stays readable after a crash;
+            # the temp file is dot-prefixed so pyarrow skips it if one is left behind
+            tmp_path = os.path.join(OUTPUT_PARQUET_DIR, f".{name}.tmp")
+            pq.write_table(pa.Table.from_pylist(rows, schema=self.parquet_schema), tmp_path, compression="zstd")
+            os.replace(tmp_path, path)
+            self._parquet_part += 1
+            self._parquet_buffer = []
+        except Exception as e:
+            # keep the buffer so the next flush retries these rows
+            print(f"Error saving Parquet: {e}")
+
+    def close_parquet(self):
+        self.flush_parquet()
+
+    def add_record(self, record):
+        self.processed_data.append(record)
+        self._processed_keys.add(
+            self._record_key(record.get("School", ""), record.get("State/UT", ""))
+        )
+        self.jsonl_file.write(self._json_line(record))
+        self.jsonl_file.flush()
+        if self.parquet_schema is not None:
+            self._parquet_buffer.append(record)
+            if len(self._parquet_buffer) % PARQUET_BATCH_SIZE == 0:
+                self.flush_parquet()
+
+    @staticmethod
+    def _record_key(school_name, state_ut):
+        return (
+            " ".join(str(school_name).split()).lower(),
+            " ".join(str(state_ut).split()).lower(),
+        )
+
     def is_already_processed(self, school_name, state_ut):
-        for record in self.processed_data:
-            if (
-                record.get("School", "").strip().lower() == school_name.strip().lower()
-                and record.get("State/UT", "").strip().lower() == state_ut.strip().lower()
-            ):
-                return True
-        return False
-
-    def search_school_websites(self, school_name, state_ut, retries=5):
-        school_name_clean = " ".join(school_name.split())
-        state_ut_clean = " ".join(state_ut.split())
-        query_text = f"{school_name_clean} {state_ut_clean} official website"
+        key = self._record_key(school_name, state_ut)
+        return key in self._processed_keys or key in self._in_progress
 
-        url = "https://google.serper.dev/search"
+    def search_school_websites(self, school_name, state_ut):
+        school_name_clean = " ".join(school_name.split())
         headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
-        payload = {"q": query_text}
-        blacklist = ["indiastudychannel.com"]
+        payload = {"q": _search_query(school_name, state_ut)}
 
-        for attempt in range(retries):
+        try:
+            response = self.session.post(SERPER_URL, headers=headers, json=payload, timeout=15)
+            response.raise_for_status()
+            websites = _top_websites(response.json())
+            if websites:
+                print(f"Top {len(websites)} sites for {school_name_clean}: {websites}")
+                return websites
+        except Exception as e:
+            print(f"Search failed for {school_name_clean}: {e}")
+        print(f"No websites found for {school_name_clean}")
+        return []
+
+    def prefetch_websites(self, schools):
+        headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
+        for start in range(0, len(schools), SEARCH_BATCH_SIZE):
+            batch = schools[start:start + SEARCH_BATCH_SIZE]
+            payload = [{"q": _search_query(s, st)} for s, st in batch]
             try:
-                response = requests.post(url, headers=headers, json=payload, timeout=15)
+                response = self.session.post(SERPER_URL, headers=headers, json=payload, timeout=60)
                 response.raise_for_status()
-                result = response.json()
-                websites = []
-                if "organic" in result and result["organic"]:
-                    for item in result["organic"]:
-                        link = item.get("link", "")
-                        if link and not any(bad in link for bad in blacklist):
-                            if link.startswith(("http://", "https://")):
-                                websites.append(link)
-                        if len(websites) == 5:
-                            break
-                if websites:
-                    print(f"Top {len(websites)} sites for {school_name_clean}: {websites}")
-                    return websites
+                # keep empty results too so they aren't re-searched one by one
+                for key, result in zip(batch, response.json()):
+                    self.search_results[key] = _top_websites(result)
             except Exception as e:
-                print(f"Search attempt {attempt+1} failed for {school_name_clean}: {e}")
-            if attempt < retries - 1:
-                time.sleep(2)
-        print(f"No websites found for {school_name_clean}")
-        return []
+                print(f"Batch search failed for schools {start+1}-{start+len(batch)}: {e}")
+        found = sum(1 for websites in self.search_results.values() if websites)
+        print(f"Prefetched websites for {found}/{len(schools)} schools")
 
     def extract_info(self, text, state_ut=""):
         info = {"District": "", "Address": "", "Tel": "", "Email": ""}
 
         # Extract emails
-        emails = re.findall(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", text)
-        for e in emails:
+        for m in EMAIL_RE.finditer(text):
+            e = m.group()
             if not any(d in e.lower() for d in ["facebook.com", "twitter.com"]):
                 info["Email"] = e
                 break
 
         # Extract phone numbers
-        for raw_number in re.split(r"[\/,]", text):
+        for raw_number in _split_chunks(text):
+            if not DIGITS_RE.search(raw_number):
+                continue
             for match in phonenumbers.PhoneNumberMatcher(raw_number, "IN"):
                 info["Tel"] = phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
                 break
             if info["Tel"]:
                 break
 
-        # Extract address candidates
+        # Extract address (first matching line)
         lines = [line.strip() for line in text.split("\n") if line.strip()]
-        address_candidates = []
-        for line in lines:
-            if state_ut and re.search(r"\d{1,4}.*(" + re.escape(state_ut) + r")", line, re.I):
-                if not info["Address"]:
+        if state_ut:
+            for line in lines:
+                if _addr_re(state_ut).search(line):
                     info["Address"] = line
-                address_candidates.append(line)
+                    break
 
         # District extraction
         district = ""
         for line in lines:
-            if re.search(r"\b(district|dist|dt\.?)\b", line, re.I):
+            if DISTRICT_WORD_RE.search(line):
                 district = line
                 break
         if district:
-            district = re.sub(r"(?i)district[:\s-]*|opening of the new|reg|government of|india", "", district)
+            district = DISTRICT_CLEAN_RE.sub("", district)
             parts = [p.strip() for p in district.split(",") if p.strip()]
             if parts:
                 info["District"] = parts[-1].title()
-        elif address_candidates:
-            addr_line = address_candidates[0]
-            match = re.search(r"(.+?),?\s*" + re.escape(state_ut), addr_line, re.I)
+        elif info["Address"]:
+            match = _district_guess_re(state_ut).search(info["Address"])
             if match:
                 district_guess = match.group(1).split(",")[-1].strip()
                 info["District"] = district_guess.title()
 
         return info
 
-    def scrape_school_info(self, url, state_ut=""):
-        info = {"District": "", "Address": "", "Tel": "", "Email": ""}
+    async def fetch_page(self, url):
+        host = urlparse(url).netloc
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, timeout=15, headers=headers)
+            response = await self.client.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+        except httpx.HTTPError as e:
+            if not isinstance(e, httpx.HTTPStatusError) or e.response.status_code >= 500:
+                failures = self._host_failures.get(host, 0) + 1
+                self._host_failures[host] = failures
+                if failures >= MAX_HOST_FAILURES:
+                    self._bad_hosts.add(host)
+            raise
+        self._host_failures[host] = 0
+        # final URL after redirects: the base for links on the page
+        return response.content, str(response.url)
+
+    async def scrape_school_info(self, url, state_ut=""):
+        cached = self._page_cache.get((url, state_ut))
+        if cached is not None:
+            return dict(cached)
+
+        info = {"District": "", "Address": "", "Tel": "", "Email": ""}
+        if urlparse(url).netloc in self._bad_hosts:
+            print(f"Skipping {url}: host failed {MAX_HOST_FAILURES} times in a row")
+            return info
+        fetched = False
+        try:
+            content, page_url = await self.fetch_page(url)
+            fetched = True
+            # full parse on purpose; contact details are often outside <a>/<p>
+            tree = LexborHTMLParser(content)
 
             # Extract address from location icons
-            loc_p = soup.find("p", class_="loc-icon")
+            loc_p = tree.css_first("p.loc-icon")
             if loc_p:
-                info["Address"] = loc_p.get_text(separator=", ", strip=True)
+                info["Address"] = _node_text(loc_p, ", ")
 
-            text = soup.get_text(separator="\n", strip=True)
+            text = _page_text(tree)
             info.update(self.extract_info(text, state_ut))
 
             # Follow About / Contact pages
-            for a in soup.find_all("a", href=True):
-                page = a["href"]
-                if any(k in page.lower() for k in ["contact", "about", "reach-us", "address"]):
-                    if not page.startswith("http"):
-                        page = requests.compat.urljoin(url, page)
-                    try:
-                        resp = requests.get(page, headers=headers, timeout=15)
-                        resp.raise_for_status()
-                        text_page = BeautifulSoup(resp.text, "html.parser").get_text(separator="\n", strip=True)
-                        new_info = self.extract_info(text_page, state_ut)
-                        for key, val in new_info.items():
-                            if not info[key] and val:
-                                info[key] = val
-                    except:
-                        continue
-        except requests.exceptions.RequestException as e:
+            pages = await asyncio.gather(
+                *(self.fetch_page(page) for page in _subpage_links(tree, page_url)),
+                return_exceptions=True,
+            )
+            for page in pages:
+                if isinstance(page, Exception):
+                    continue
+                text_page = _page_text(LexborHTMLParser(page[0]))
+                new_info = self.extract_info(text_page, state_ut)
+                for key, val in new_info.items():
+                    if not info[key] and val:
+                        info[key] = val
+        except httpx.HTTPError as e:
             print(f"Request failed for {url}: {e}")
         except Exception as e:
             print(f"Failed to scrape {url}: {e}")
 
-        return info
+        if fetched:
+            self._page_cache[(url, state_ut)] = info
+        return dict(info)
 
-    def process_school(self, row_data, index, total):
-        school_name = str(row_data["School"]).replace("\n", " ").strip()
-        state_ut = str(row_data["State/UT"]).replace("\n", " ").strip()
+    async def process_school(self, row_data, index, total):
+        school_name = row_data["School"]
+        state_ut = row_data["State/UT"]
 
         if self.is_already_processed(school_name, state_ut):
             print(f"{index+1}/{total} - {school_name}: Already processed, skipping")
@@ -186,19 +449,29 @@ class SchoolDataScraper:
 
         print(f"{index+1}/{total} - Processing: {school_name}, {state_ut}")
 
+        key = self._record_key(school_name, state_ut)
+        self._in_progress.add(key)
+        try:
+            await self._scrape_and_save(row_data, school_name, state_ut)
+        finally:
+            self._in_progress.discard(key)
+
+    async def _scrape_and_save(self, row_data, school_name, state_ut):
         record = dict(row_data)
-        record.update({"Website": "", "District": "", "Address": "", "Tel": "", "Email": ""})
+        record.update(dict.fromkeys(OUTPUT_FIELDS, ""))
 
-        websites = self.search_school_websites(school_name, state_ut)
+        websites = self.search_results.pop((school_name, state_ut), None)
+        if websites is None:
+            websites = await asyncio.to_thread(self.search_school_websites, school_name, state_ut)
         if not websites:
-            self.processed_data.append(record)
-            self.save_to_json()
+            self.add_record(record)
             return
 
         record["Website"] = websites[0]
+        websites = _dedupe_by_host(websites)
         merged_info = {"District": "", "Address": "", "Tel": "", "Email": ""}
-        for url in websites:
-            info = self.scrape_school_info(url, state_ut)
+        results = await asyncio.gather(*(self.scrape_school_info(url, state_ut) for url in websites))
+        for info in results:
             for key, value in info.items():
                 if not merged_info[key] and value:
                     merged_info[key] = value
@@ -206,41 +479,60 @@ class SchoolDataScraper:
         record.update(merged_info)
         print(f"Final merged info for {school_name}: Email={bool(record['Email'])}, Tel={bool(record['Tel'])}, District={bool(record['District'])}, Address={bool(record['Address'])}")
 
-        self.processed_data.append(record)
-        self.save_to_json()
-        time.sleep(1)
+        self.add_record(record)
+        await asyncio.sleep(1)
+
+    async def process_all(self, df):
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCHOOLS)
+
+        async def worker(index, row):
+            async with semaphore:
+                try:
+                    await self.process_school(row, index, len(df))
+                except Exception as e:
+                    print(f"Error processing row {index}: {e}")
+
+        try:
+            await asyncio.gather(*(worker(index, row) for index, row in df.iterrows()))
+        finally:
+            await self.client.aclose()
 
     def run(self):
         try:
             print(f"Loading Excel file: {INPUT_EXCEL}")
-            df = pd.read_excel(INPUT_EXCEL)
+            df = pd.read_excel(INPUT_EXCEL, engine="openpyxl")
             print(f"Loaded {len(df)} records from Excel")
-            start_index = len(self.processed_data)
-            if start_index > 0:
-                print(f"Resuming from record {start_index+1}/{len(df)}")
+            self.columns = list(df.columns) + OUTPUT_FIELDS
+            self.open_parquet()
+            for col in ["School", "State/UT"]:
+                df[col] = df[col].astype(str).str.replace("\n", " ", regex=False).str.strip()
+            for index, key in enumerate(zip(df["School"], df["State/UT"])):
+                self.row_order.setdefault(self._record_key(*key), index)
+            if self.processed_data:
+                print(f"Resuming with {len(self.processed_data)}/{len(df)} records already processed")
 
-            for index, row in df.iterrows():
-                if index < start_index:
-                    continue
-                try:
-                    self.process_school(row, index, len(df))
-                except KeyboardInterrupt:
-                    print("\nProcess interrupted by user. Data saved to JSON.")
-                    break
-                except Exception as e:
-                    print(f"Error processing row {index}: {e}")
-                    continue
+            pending = [key for key in dict.fromkeys(zip(df["School"], df["State/UT"])) if not self.is_already_processed(*key)]
+            self.prefetch_websites(pending)
 
+            try:
+                asyncio.run(self.process_all(df))
+            except KeyboardInterrupt:
+                print("\nProcess interrupted by user. Data saved to JSON.")
+
+            self.save_to_json()
             self.save_to_excel()
         except Exception as e:
             print(f"Error in main execution: {e}")
         finally:
+            self.jsonl_file.close()
+            self.close_parquet()
             print(f"Process completed. Total records processed: {len(self.processed_data)}")
 
     def save_to_excel(self):
         try:
             if self.processed_data:
-                df_output = pd.DataFrame(self.processed_data)
+                df_output = pd.DataFrame(self.ordered_records(), columns=self.columns or None)
+                df_output = df_output.astype(dict.fromkeys(OUTPUT_FIELDS, "string"))
                 df_output.to_excel(OUTPUT_EXCEL, index=False)
                 print(f"Excel file saved to {OUTPUT_EXCEL}")
             else: